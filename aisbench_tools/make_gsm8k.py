@@ -1,21 +1,58 @@
 #!/usr/bin/env python3
 """Generate GSM8K dataset for benchmarking."""
 
-import json
-import subprocess
+import hashlib
+import os
+import pickle
+import shutil
+import zipfile
+from contextlib import suppress
+from functools import partial
+from itertools import cycle, islice
 from pathlib import Path
+from urllib.request import urlopen
 
 import click
+import orjson
 from loguru import logger
 from modelscope import snapshot_download
+from tokenizers import Tokenizer, decoders
 from transformers import AutoTokenizer
 
+try:
+    from modelscope_hub.errors import CacheNotFound
+except ImportError:
+    # Older modelscope SDKs report a local-only cache miss as ValueError
+    CacheNotFound = ValueError
+
+_CACHE_MISS = (ValueError, CacheNotFound)
+_REQUIRED_TOKENIZER_FILES = ("tokenizer.json", "tokenizer_config.json")
+# Bump when load_questions or the encode options in encode_questions change
+_CACHE_VERSION = 1
+
+
+def _parse_configs(ctx, param, value: tuple[str, ...]) -> list[tuple[int, int]]:
+    """Parse repeated input_len:batch_size options."""
+    configs = []
+    for item in value:
+        input_len, sep, batch_size = item.partition(":")
+        if not sep or not input_len.isdigit() or not batch_size.isdigit():
+            raise click.BadParameter(f"expected input_len:batch_size, got {item!r}")
+        configs.append((int(input_len), int(batch_size)))
+    return configs
+
 
 @click.command()
 @click.option(
     "--input-len", default=64000, show_default=True, help="Input token length"
 )
 @click.option("--batch-size", default=2800, show_default=True, help="Batch size")
+@click.option(
+    "--configs",
+    multiple=True,
+    callback=_parse_configs,
+    help="input_len:batch_size pair, repeatable; overrides --input-len/--batch-size",
+)
 @click.option(
     "--model-id", default="deepseek-ai/DeepSeek-V3", help="Model ID from modelscope"
 )
@@ -24,104 +61,185 @@ from transformers import AutoTokenizer
 )
 @click.option("--zip-path", default="./gsm8k.zip", help="Path to GSM8K zip file")
 @click.option("--gsm8k-dir", default="./gsm8k", help="GSM8K extracted directory")
+@click.option(
+    "--no-cache", is_flag=True, help="Re-tokenize GSM8K instead of reusing the cache"
+)
 def main(
     input_len: int,
     batch_size: int,
+    configs: list[tuple[int, int]],
     model_id: str,
     cache_dir: str,
     zip_path: str,
     gsm8k_dir: str,
+    no_cache: bool,
 ):
-    """Generate GSM8K dataset with specified input length and batch size."""
-    cache_dir = Path(cache_dir)
-    zip_path = Path(zip_path)
+    """Generate GSM8K datasets with specified input lengths and batch sizes."""
     gsm8k_file = Path(gsm8k_dir) / "train.jsonl"
 
-    output_file = Path(f"GSM8K-in{input_len}-bs{batch_size}.jsonl")
-
-    if output_file.exists():
-        logger.info(f"Dataset already exists: {output_file}")
+    pending = {}
+    for length, size in configs or [(input_len, batch_size)]:
+        output_file = Path(f"GSM8K-in{length}-bs{size}.jsonl")
+        if output_file.exists():
+            logger.info(f"Dataset already exists: {output_file}")
+        else:
+            pending[length, size] = output_file
+    if not pending:
         return
 
-    tokenizer_path = download_tokenizer_only(model_id, str(cache_dir))
+    tokenizer_path = download_tokenizer_only(model_id, cache_dir)
     logger.success(f"Tokenizer downloaded to: {tokenizer_path}")
 
-    if not gsm8k_file.exists():
-        if not zip_path.exists():
-            download_url = "http://opencompass.oss-cn-shanghai.aliyuncs.com/datasets/data/gsm8k.zip"
-            logger.info(
-                f"{zip_path} not found locally. Attempting to download from {download_url}..."
-            )
-            try:
-                # Try with wget
-                subprocess.run(["wget", "-O", str(zip_path), download_url], check=True)
-                logger.success(f"Successfully downloaded {zip_path}")
-            except FileNotFoundError:
-                logger.error(
-                    "wget not found. Please install wget to download the zip file."
-                )
-                return
-            except subprocess.CalledProcessError as e:
-                logger.error(f"Wget download failed: {e}")
-                return
-        logger.info(f"Unzipping {zip_path}...")
-        subprocess.run(
-            ["unzip", "-o", str(zip_path), "-d", str(zip_path.parent)], check=True
+    if not ensure_gsm8k(gsm8k_file, Path(zip_path)):
+        return
+
+    # Batched encode/decode fan out over the Rust rayon pool when enabled
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "true")
+    # The Rust tokenizer skips the Python wrapper's per-call pre/postprocessing
+    tokenizer = AutoTokenizer.from_pretrained(tokenizer_path).backend_tokenizer
+    input_ids, texts = encode_questions(tokenizer, gsm8k_file, use_cache=not no_cache)
+
+    for (length, size), output_file in pending.items():
+        samples = pad_questions(tokenizer, input_ids, texts, length)
+        write_dataset(output_file, samples, size)
+
+
+def ensure_gsm8k(gsm8k_file: Path, zip_path: Path) -> bool:
+    """Download and extract GSM8K unless gsm8k_file is already on disk."""
+    if gsm8k_file.exists():
+        return True
+
+    if not zip_path.exists():
+        download_url = (
+            "http://opencompass.oss-cn-shanghai.aliyuncs.com/datasets/data/gsm8k.zip"
+        )
+        logger.info(
+            f"{zip_path} not found locally. Attempting to download from {download_url}..."
         )
+        try:
+            download_file(download_url, zip_path)
+            logger.success(f"Successfully downloaded {zip_path}")
+        except OSError as e:
+            logger.error(f"Download failed: {e}")
+            return False
+
+    logger.info(f"Unzipping {zip_path}...")
+    with zipfile.ZipFile(zip_path) as zf:
+        members = [n for n in zf.namelist() if Path(n).name == gsm8k_file.name]
+        zf.extractall(zip_path.parent, members=members)
 
     if not gsm8k_file.exists():
         logger.error(f"Still not found after unzip: {gsm8k_file}")
-        return
+        return False
+    return True
+
+
+def encode_questions(
+    tokenizer: Tokenizer, gsm8k_file: Path, use_cache: bool = True
+) -> tuple[list[list[int]], list[str]]:
+    """Encode the GSM8K questions, reusing ids cached for this file and tokenizer."""
+    cache_path = gsm8k_file.with_suffix(".tokens.pkl")
+    hasher = hashlib.sha256(gsm8k_file.read_bytes())
+    hasher.update(tokenizer.to_str().encode("utf-8"))
+    digest = hasher.digest()
+    if use_cache:
+        try:
+            version, cached_digest, input_ids, texts = pickle.loads(
+                cache_path.read_bytes()
+            )
+            if version == _CACHE_VERSION and cached_digest == digest:
+                logger.info(f"Reusing tokenized questions from {cache_path}")
+                return input_ids, texts
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            pass
 
-    tokenizer = AutoTokenizer.from_pretrained(tokenizer_path)
     logger.info(f"Loading GSM8K from {gsm8k_file}...")
+    dataset = load_questions(gsm8k_file)
+
+    logger.info(f"Processing {len(dataset)} questions...")
+    input_ids = [
+        enc.ids
+        for enc in tokenizer.encode_batch(dataset, add_special_tokens=False)
+        if enc.ids
+    ]
+    texts = tokenizer.decode_batch(input_ids, skip_special_tokens=False)
+    try:
+        cache_path.write_bytes(pickle.dumps((_CACHE_VERSION, digest, input_ids, texts)))
+    except OSError as e:
+        logger.warning(f"Could not write token cache {cache_path}: {e}")
+    return input_ids, texts
+
 
+def load_questions(gsm8k_file: Path) -> list[str]:
+    """Read the non-blank questions from a GSM8K JSONL file."""
     dataset = []
-    with open(gsm8k_file, "r", encoding="utf-8") as f:
+    with open(gsm8k_file, "rb") as f:
         for line in f:
-            data = json.loads(line)
-            dataset.append(data["question"])
+            question = orjson.loads(line)["question"]
+            if question.strip():
+                dataset.append(question)
+    return dataset
 
-    logger.info(f"Processing {len(dataset)} questions...")
 
-    dataset_2k = []
-    for sentence in dataset:
-        words = tokenizer.tokenize(sentence)
-        if not words:
-            continue
-        # Ensure words has at least input_len tokens, by repeating if necessary
-        while len(words) < input_len:
-            words.extend(words)
-        # Then truncate to input_len
-        words = words[:input_len]
+def pad_questions(
+    tokenizer: Tokenizer,
+    input_ids: list[list[int]],
+    texts: list[str],
+    input_len: int,
+) -> list[str]:
+    """Repeat each question's tokens to exactly input_len and return the text."""
+    repeats = [divmod(input_len, len(ids)) for ids in input_ids]
+    if not isinstance(tokenizer.decoder, decoders.ByteLevel):
+        # Other decoders add or drop joining spaces, so decode the full ids
+        return tokenizer.decode_batch(
+            [(ids * (n + 1))[:input_len] for ids, (n, _) in zip(input_ids, repeats)],
+            skip_special_tokens=False,
+        )
+    # Byte-level BPE decoding is concatenative, so input_len tokens of a repeated
+    # question decode to n copies of the question text plus a decoded prefix.
+    tails = tokenizer.decode_batch(
+        [ids[:r] for ids, (_, r) in zip(input_ids, repeats)],
+        skip_special_tokens=False,
+    )
+    return [text * n + tail for text, tail, (n, _) in zip(texts, tails, repeats)]
 
-        decoded_text = tokenizer.convert_tokens_to_string(words)
-        dataset_2k.append(decoded_text)
 
-    logger.info(f"Writing {len(dataset_2k)} samples to {output_file}...")
+def write_dataset(output_file: Path, samples: list[str], batch_size: int) -> None:
+    """Write batch_size samples, repeating them as needed, as JSONL."""
+    logger.info(f"Writing {len(samples)} samples to {output_file}...")
 
-    if not dataset_2k:
+    if not samples:
         logger.warning("No samples to write to output file. Skipping file creation.")
         return
 
-    # Ensure dataset_2k has at least batch_size samples, by repeating if necessary
-    while len(dataset_2k) < batch_size:
-        dataset_2k.extend(dataset_2k)
-    # Then truncate to batch_size
-    dataset_2k = dataset_2k[:batch_size]
-
-    with open(output_file, "w", encoding="utf-8") as f:
-        for item in dataset_2k:
-            f.write(
-                json.dumps({"question": item, "answer": "none"}, ensure_ascii=False)
-                + "\n"
+    # Cycle through the samples until batch_size records have been written
+    with open(output_file, "wb") as f:
+        f.writelines(
+            orjson.dumps(
+                {"question": item, "answer": "none"}, option=orjson.OPT_APPEND_NEWLINE
             )
+            for item in islice(cycle(samples), batch_size)
+        )
 
     logger.success(f"Done: {output_file}")
 
 
+def download_file(url: str, dest: Path) -> None:
+    """Stream url to dest, replacing dest only once the download is complete."""
+    part_path = dest.with_name(dest.name + ".part")
+    with urlopen(url, timeout=60) as response, open(part_path, "wb") as out:
+        expected_size = response.headers.get("Content-Length")
+        shutil.copyfileobj(response, out, length=1024 * 1024)
+
+    size = part_path.stat().st_size
+    if expected_size is not None and size != int(expected_size):
+        part_path.unlink()
+        raise OSError(f"Incomplete download: got {size} of {expected_size} bytes")
+    os.replace(part_path, dest)
+
+
 def download_tokenizer_only(model_id: str, cache_dir: str) -> str:
-    """Download tokenizer files only from modelscope."""
+    """Download tokenizer files only from modelscope, reusing a local copy."""
     tokenizer_files = [
         "tokenizer_config.json",
         "tokenizer.json",
@@ -132,13 +250,19 @@ def download_tokenizer_only(model_id: str, cache_dir: str) -> str:
         "config.json",
     ]
 
-    model_path = snapshot_download(
+    download = partial(
+        snapshot_download,
         model_id,
         cache_dir=cache_dir,
         ignore_patterns=["*.bin", "*.safetensors", "*.pth", "*.model", "*.gguf"],
         allow_patterns=tokenizer_files,
     )
-    return model_path
+    # Skip the hub freshness check when a previous run already fetched the files
+    with suppress(*_CACHE_MISS):
+        model_path = Path(download(local_files_only=True))
+        if all((model_path / name).is_file() for name in _REQUIRED_TOKENIZER_FILES):
+            return str(model_path)
+    return download()
 
 
 if __name__ == "__main__":
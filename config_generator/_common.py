@@ -0,0 +1,80 @@
+"""
+Helpers shared by the config generators.
+"""
+
+import hashlib
+import pickle
+from collections.abc import Callable
+from pathlib import Path
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from loguru import logger
+
+CACHE_DIR = Path.home() / ".cache" / "gds"
+
+
+def fetch_cached(url: str, cache_path: Path) -> str:
+    """Fetch url, revalidating the on-disk copy at cache_path with the server."""
+    etag_path = cache_path.with_name(cache_path.name + ".etag")
+    last_modified_path = cache_path.with_name(cache_path.name + ".last-modified")
+    headers = {}
+    if cache_path.exists():
+        if etag_path.exists():
+            headers["If-None-Match"] = etag_path.read_text(encoding="utf-8")
+        if last_modified_path.exists():
+            headers["If-Modified-Since"] = last_modified_path.read_text(
+                encoding="utf-8"
+            )
+
+    try:
+        with urlopen(Request(url, headers=headers), timeout=30) as response:
+            content = response.read().decode("utf-8")
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+    except HTTPError as e:
+        if e.code != 304:
+            raise
+        return cache_path.read_text(encoding="utf-8")
+    except (URLError, TimeoutError) as e:
+        if not cache_path.exists():
+            raise
+        logger.warning(f"Fetch failed ({e}), using cached {cache_path}")
+        return cache_path.read_text(encoding="utf-8")
+
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(content, encoding="utf-8")
+        _write_validator(etag_path, etag)
+        _write_validator(last_modified_path, last_modified)
+    except OSError as e:
+        logger.warning(f"Could not write cache {cache_path}: {e}")
+    return content
+
+
+def _write_validator(path: Path, value: str | None) -> None:
+    """Store a response validator header beside the cache, or drop a stale one."""
+    if value:
+        path.write_text(value, encoding="utf-8")
+    else:
+        path.unlink(missing_ok=True)
+
+
+def parse_cached(
+    content: str, parse: Callable[[str], dict], pickle_path: Path, version: int
+) -> dict:
+    """Return parse(content), reusing the pickle while content and version match."""
+    digest = hashlib.sha256(content.encode("utf-8")).digest()
+    try:
+        cached_version, cached_digest, result = pickle.loads(pickle_path.read_bytes())
+        if cached_version == version and cached_digest == digest:
+            return result
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+        pass
+
+    result = parse(content)
+    try:
+        pickle_path.write_bytes(pickle.dumps((version, digest, result)))
+    except OSError as e:
+        logger.warning(f"Could not write parse cache {pickle_path}: {e}")
+    return result
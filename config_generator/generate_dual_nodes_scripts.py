@@ -6,14 +6,36 @@ Generate dual-node deployment scripts from GitHub config.
 import shlex
 import socket
 from pathlib import Path
-from urllib.request import urlopen
 
 import click
 import yaml
 from loguru import logger
 
+try:
+    from config_generator._common import CACHE_DIR, fetch_cached
+except ModuleNotFoundError:
+    # Run as a plain script: the script's own directory is on sys.path
+    from _common import CACHE_DIR, fetch_cached
+
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
 CONFIG_URL_TEMPLATE = "https://raw.githubusercontent.com/starmountain1997/vllm-ascend/{branch}/tests/e2e/nightly/multi_node/config/DeepSeek-V3_2-W8A8-A3-dual-nodes.yaml"
 
+SCRIPT_TEMPLATE = """#!/bin/bash
+# Node {node_idx} ({node_type})
+
+{env_block}
+
+# ==================== Node Configuration ====================
+# {ip_hint}
+
+# ==================== Startup Command ====================
+{full_cmd}
+"""
+
 
 def get_local_ip() -> str:
     """Get the local IP address of this machine."""
@@ -80,9 +102,10 @@ def main(
     if master_ip is None:
         master_ip = get_local_ip()
 
+    env_block = format_env_block(env_common)
     node0_script = generate_script(
         deployments[0],
-        env_common,
+        env_block,
         model,
         served_model_name,
         master_ip,
@@ -90,15 +113,15 @@ def main(
     )
     node1_script = generate_script(
         deployments[1],
-        env_common,
+        env_block,
         model,
         served_model_name,
         master_ip,
         is_master=False,
     )
 
-    (output_dir / "node0.sh").write_text(node0_script)
-    (output_dir / "node1.sh").write_text(node1_script)
+    (output_dir / "node0.sh").write_text(node0_script, newline="")
+    (output_dir / "node1.sh").write_text(node1_script, newline="")
 
     logger.success(f"Generated: {output_dir / 'node0.sh'}")
     logger.success(f"Generated: {output_dir / 'node1.sh'}")
@@ -111,9 +134,8 @@ def main(
 def fetch_config(branch: str = "main") -> dict:
     """Fetch YAML config from GitHub."""
     url = CONFIG_URL_TEMPLATE.format(branch=branch)
-    with urlopen(url, timeout=30) as response:
-        content = response.read().decode("utf-8")
-        return yaml.safe_load(content)
+    content = fetch_cached(url, CACHE_DIR / branch / Path(url).name)
+    return yaml.load(content, Loader=YamlLoader)
 
 
 def extract_model_from_cmd(cmd_block: str) -> str:
@@ -124,9 +146,34 @@ def extract_model_from_cmd(cmd_block: str) -> str:
     return ""
 
 
+def _passthrough_args(tokens: list[str]) -> list[str]:
+    """Drop the original model path and any --served-model-name (and its value)."""
+    is_flag = [t.startswith("-") for t in tokens]
+    args = []
+    i = 1 if tokens and not is_flag[0] else 0
+    while i < len(tokens):
+        token = tokens[i]
+        i += 1
+        if token == "--served-model-name":
+            if i < len(tokens) and not is_flag[i]:
+                i += 1
+        elif not token.startswith("--served-model-name="):
+            args.append(token)
+    return args
+
+
+def format_env_block(env_common: dict) -> str:
+    """Render env_common as the export block shared by both node scripts."""
+    env_lines = ["# ==================== Environment Variables ===================="]
+    for key, value in env_common.items():
+        value_str = "true" if isinstance(value, bool) else str(value)
+        env_lines.append(f'export {key}="{value_str}"')
+    return "\n".join(env_lines)
+
+
 def generate_script(
     deploy: dict,
-    env_common: dict,
+    env_block: str,
     model_path: str,
     served_model_name: str,
     master_ip: str | None,
@@ -157,26 +204,8 @@ def generate_script(
     new_cmd_args.append("--served-model-name")
     new_cmd_args.append(served_model_name)
 
-    # Append any other flags and values from the original command.
-    # We start iterating from index 2, which is where the original model path would be.
-    # We need to filter out the original model path and any pre-existing --served-model-name flags.
-    i = 2
-    while i < len(original_tokens):
-        token = original_tokens[i]
-
-        # Skip the original model path if it was at index 2 and not a flag
-        if i == 2 and not original_tokens[2].startswith("-"):
-            i += 1
-            continue
-
-        # Skip --served-model-name and its value if it already exists (defensive check)
-        if token == "--served-model-name":
-            # Assuming --served-model-name always has a value immediately following it
-            i += 2
-            continue
-
-        new_cmd_args.append(token)
-        i += 1
+    # Append any other flags and values from the original command
+    new_cmd_args.extend(_passthrough_args(original_tokens[2:]))
 
     # Quote each argument and join them for the shell script
     full_cmd = " \\\n    ".join([shlex.quote(arg) for arg in new_cmd_args])
@@ -185,11 +214,6 @@ def generate_script(
     if not is_master and master_ip:
         full_cmd = full_cmd.replace("$MASTER_IP", master_ip)
 
-    env_lines = ["# ==================== Environment Variables ===================="]
-    for key, value in env_common.items():
-        value_str = "true" if isinstance(value, bool) else str(value)
-        env_lines.append(f'export {key}="{value_str}"')
-
     node_type = "Master Node" if is_master else "Worker Node"
     node_idx = "0" if is_master else "1"
     ip_hint = (
@@ -198,17 +222,13 @@ def generate_script(
         else "MASTER_IP needs to be replaced with Node 0's IP"
     )
 
-    return f"""#!/bin/bash
-# Node {node_idx} ({node_type})
-
-{chr(10).join(env_lines)}
-
-# ==================== Node Configuration ====================
-# {ip_hint}
-
-# ==================== Startup Command ====================
-{full_cmd}
-"""
+    return SCRIPT_TEMPLATE.format(
+        node_idx=node_idx,
+        node_type=node_type,
+        env_block=env_block,
+        ip_hint=ip_hint,
+        full_cmd=full_cmd,
+    )
 
 
 if __name__ == "__main__":
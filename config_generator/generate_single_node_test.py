@@ -4,13 +4,24 @@ Generate single-node vLLM server startup script from GitHub config.
 """
 
 import ast
+import io
 import shlex
+from collections import deque
+from functools import lru_cache
 from pathlib import Path
-from urllib.request import urlopen
 
 import click
 from loguru import logger
 
+try:
+    from config_generator._common import CACHE_DIR, fetch_cached, parse_cached
+except ModuleNotFoundError:
+    # Run as a plain script: the script's own directory is on sys.path
+    from _common import CACHE_DIR, fetch_cached, parse_cached
+
+# Bump when parse_python_config or _VALUE_HANDLERS change what they return
+_CACHE_VERSION = 1
+
 CONFIG_URL = "https://raw.githubusercontent.com/starmountain1997/vllm-ascend/{branch}/tests/e2e/nightly/single_node/models/test_deepseek_v3_2_w8a8.py"
 
 
@@ -71,7 +82,7 @@ def main(
         server_port,
         config.get("env_dict", {}),
     )
-    (output_dir / "start_server.sh").write_text(script)
+    (output_dir / "start_server.sh").write_text(script, newline="")
 
     logger.success(f"Generated: {output_dir / 'start_server.sh'}")
 
@@ -83,49 +94,73 @@ def main(
 def fetch_config(branch: str) -> dict:
     """Fetch Python test config from GitHub."""
     url = CONFIG_URL.format(branch=branch)
-    with urlopen(url, timeout=30) as response:
-        content = response.read().decode("utf-8")
-        return parse_python_config(content)
+    cache_path = CACHE_DIR / branch / Path(url).name
+    content = fetch_cached(url, cache_path)
+    return parse_cached(
+        content,
+        parse_python_config,
+        cache_path.with_name(cache_path.name + ".pkl"),
+        _CACHE_VERSION,
+    )
+
+
+def _str_call_value(node: ast.Call) -> object | None:
+    """Handle str(xxx) calls - extract the variable name."""
+    if not (isinstance(node.func, ast.Name) and node.func.id == "str"):
+        return None
+    arg = node.args[0]
+    if isinstance(arg, ast.Name):
+        return f"STR_{arg.id.upper()}"
+    return _get_ast_node_value(arg)
+
+
+_VALUE_HANDLERS = {
+    ast.Constant: lambda node: node.value,
+    ast.Name: lambda node: node.id,
+    ast.List: lambda node: [_get_ast_node_value(elt) for elt in node.elts],
+    ast.Dict: lambda node: {
+        _get_ast_node_value(k): _get_ast_node_value(v)
+        for k, v in zip(node.keys, node.values)
+    },
+    ast.Call: _str_call_value,
+}
 
 
-def _get_ast_node_value(node: ast.AST) -> object | None:
+def _get_ast_node_value(node: ast.AST | None) -> object | None:
     """Recursively extract value from an AST node, handling various types and str() calls."""
-    if isinstance(node, ast.Constant):
-        return node.value
-    elif isinstance(node, ast.Name):
-        return node.id
-    elif isinstance(node, ast.List):
-        return [_get_ast_node_value(elt) for elt in node.elts]
-    elif isinstance(node, ast.Dict):
-        return {
-            _get_ast_node_value(k): _get_ast_node_value(v)
-            for k, v in zip(node.keys, node.values)
-        }
-    elif (
-        isinstance(node, ast.Call)
-        and isinstance(node.func, ast.Name)
-        and node.func.id == "str"
-    ):
-        # Handle str(xxx) calls - extract the variable name
-        arg = node.args[0]
-        if isinstance(arg, ast.Name):
-            return f"STR_{arg.id.upper()}"
-        else:
-            return _get_ast_node_value(arg)
-    return None
+    handler = _VALUE_HANDLERS.get(type(node))
+    return handler(node) if handler else None
+
+
+_BLOCK_TYPES = (ast.stmt, ast.excepthandler, ast.match_case)
 
 
+def _iter_statements(tree: ast.Module):
+    """Yield statements in ast.walk order without descending into expressions."""
+    queue = deque(tree.body)
+    while queue:
+        node = queue.popleft()
+        queue.extend(
+            child
+            for child in ast.iter_child_nodes(node)
+            if isinstance(child, _BLOCK_TYPES)
+        )
+        yield node
+
+
+@lru_cache(maxsize=32)
 def parse_python_config(content: str) -> dict:
     """Parse Python config file using AST."""
     tree = ast.parse(content)
     result = {}
 
-    for node in ast.walk(tree):
-        if isinstance(node, ast.Assign):
-            for target in node.targets:
-                if isinstance(target, ast.Name):
-                    name = target.id
-                    result[name] = _get_ast_node_value(node.value)
+    # Function bodies are walked too: env_dict/server_args live inside the test
+    for node in _iter_statements(tree):
+        if not isinstance(node, ast.Assign):
+            continue
+        names = [t.id for t in node.targets if isinstance(t, ast.Name)]
+        if names:
+            result.update(dict.fromkeys(names, _get_ast_node_value(node.value)))
     return result
 
 
@@ -134,18 +169,15 @@ def format_args(args: list, tp_size: int, dp_size: int, port: int) -> str:
     if not args:
         return ""
 
-    tokens = [
-        str(tp_size)
-        if a == "STR_TP_SIZE"
-        else str(dp_size)
-        if a == "STR_DP_SIZE"
-        else str(port)
-        if a == "STR_PORT"
-        else a
-        for a in args
-    ]
-
-    formatted_parts = []
+    placeholders = {
+        "STR_TP_SIZE": str(tp_size),
+        "STR_DP_SIZE": str(dp_size),
+        "STR_PORT": str(port),
+    }
+    tokens = [placeholders.get(a, a) for a in args]
+
+    buf = io.StringIO()
+    sep = ""
     i = 0
     while i < len(tokens):
         token = tokens[i]
@@ -154,25 +186,28 @@ def format_args(args: list, tp_size: int, dp_size: int, port: int) -> str:
             if "=" in token:
                 # Handle --flag=value format
                 flag, value = token.split("=", 1)
-                formatted_parts.append(f"{flag}={shlex.quote(value)}")
+                part = f"{flag}={shlex.quote(value)}"
             else:
                 # Handle --flag value or --flag (boolean)
                 # Check if the next token is a value (not starting with '-')
                 if i + 1 < len(tokens) and not tokens[i + 1].startswith("-"):
                     value = tokens[i + 1]
-                    formatted_parts.append(f"{token} {shlex.quote(value)}")
+                    part = f"{token} {shlex.quote(value)}"
                     i += 1  # Consume the value token
                 else:
                     # Boolean flag, no separate value
-                    formatted_parts.append(token)
+                    part = token
         else:
             # This case means a token that does not start with '--' is encountered.
             # This should ideally not happen if `server_args` is well-formed.
             # For robustness, we quote it.
-            formatted_parts.append(shlex.quote(token))
+            part = shlex.quote(token)
+        buf.write(sep)
+        buf.write(part)
+        sep = " \\\n    "
         i += 1
 
-    return " \\\n    ".join(formatted_parts)
+    return buf.getvalue()
 
 
 def generate_script(
@@ -187,12 +222,12 @@ def generate_script(
     """Generate vLLM server startup script."""
     formatted_args = format_args(args, tp_size, dp_size, server_port)
 
-    env_lines = [f'export {key}="{value}"' for key, value in env.items()]
+    env_block = "\n".join(f'export {key}="{value}"' for key, value in env.items())
 
     return f"""#!/bin/bash
 # vLLM Server Startup Script
 
-{chr(10).join(env_lines)}
+{env_block}
 
 # ==================== Server Configuration ====================
 # Model: {model}
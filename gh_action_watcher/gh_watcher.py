@@ -4,15 +4,21 @@ Runs save_gh_logs.py, then commits and pushes changes to git.
 """
 
 import csv
-import json
+import io
+import os
 import re
 import sqlite3
 import subprocess
+import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
+from typing import TextIO
 
 import click
+import requests
+import urllib3
 from dotenv import load_dotenv
 from loguru import logger
 from openai import OpenAI
@@ -25,6 +31,13 @@ TARGET_JOBS = [
     "deepseek-v3-2-w8a8",
 ]
 
+_JOB_RE = re.compile("|".join(map(re.escape, TARGET_JOBS)))
+_GH_API = "https://api.github.com"
+_THREAD_STATE = threading.local()
+_LOG_SEP = "=" * 60 + "\n\n"
+_MADE_DIRS: set[Path] = set()
+_THROUGHPUT_RE = re.compile(r"Output Token Throughput │ total\s+│ (\d+\.\d+) token/s")
+
 
 def run_command(
     command: list[str], cwd: Path | None = None
@@ -45,83 +58,132 @@ def run_command(
     return result
 
 
-def _run_gh_cli(args: list[str]) -> subprocess.CompletedProcess:
-    """Run gh CLI command."""
-    return run_command(
-        ["gh"] + args,
-    )
+@lru_cache(maxsize=1)
+def _gh_token() -> str:
+    """GitHub token from the environment, falling back to gh's stored login."""
+    token = os.environ.get("GH_TOKEN") or os.environ.get("GITHUB_TOKEN")
+    if token:
+        return token
+    # Not via run_command: its debug logging would echo the token
+    return subprocess.run(
+        ["gh", "auth", "token"], capture_output=True, text=True, check=False
+    ).stdout.strip()
+
+
+def _gh_session() -> requests.Session:
+    """Keep-alive session for the GitHub REST API, authenticated like gh."""
+    # requests.Session is not documented as thread-safe, so each pool worker
+    # gets its own and still reuses the connection across its calls
+    session = getattr(_THREAD_STATE, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.headers["Accept"] = "application/vnd.github+json"
+        if token := _gh_token():
+            session.headers["Authorization"] = f"token {token}"
+        _THREAD_STATE.session = session
+    return session
+
+
+def _gh_get(
+    url: str, params: dict | None = None, stream: bool = False
+) -> requests.Response:
+    """GET a GitHub URL, raising on HTTP errors."""
+    logger.info(f"GET {url}")
+    response = _gh_session().get(url, params=params, stream=stream, timeout=60)
+    response.raise_for_status()
+    return response
+
+
+def _gh_api(
+    path: str, params: dict | None = None, stream: bool = False
+) -> requests.Response:
+    """GET a GitHub REST API path under REPO, raising on HTTP errors."""
+    return _gh_get(f"{_GH_API}/repos/{REPO}/{path}", params, stream)
 
 
 def get_recent_runs(limit: int = 4) -> list[dict]:
     """Get recent workflow runs for Nightly-A3."""
-    result = _run_gh_cli(
-        [
-            "run",
-            "list",
-            "-R",
-            REPO,
-            "-w",
-            WORKFLOW_NAME,
-            "-b",
-            "main",
-            "-L",
-            str(limit),
-            "-e",
-            "schedule",
-            "--json",
-            "number,databaseId,name,status,conclusion,createdAt,headBranch,headSha",
-        ]
-    )
-    if result.returncode != 0:
-        logger.error(f"Failed to list runs: {result.stderr}")
+    try:
+        # per_page is capped at 100, so larger limits span several pages
+        response = _gh_api(
+            f"actions/workflows/{WORKFLOW_NAME}/runs",
+            {"branch": "main", "event": "schedule", "per_page": min(limit, 100)},
+        )
+        runs = response.json()["workflow_runs"]
+        while len(runs) < limit and "next" in response.links:
+            response = _gh_get(response.links["next"]["url"])
+            runs.extend(response.json()["workflow_runs"])
+    except requests.RequestException as e:
+        logger.error(f"Failed to list runs: {e}")
         return []
-    return json.loads(result.stdout)
+    return [
+        {
+            "number": r["run_number"],
+            "databaseId": r["id"],
+            "name": r["name"],
+            "status": r["status"],
+            "conclusion": r["conclusion"],
+            "createdAt": r["created_at"],
+            "headBranch": r["head_branch"],
+            "headSha": r["head_sha"],
+        }
+        for r in runs[:limit]
+    ]
 
 
 def get_run_jobs(run_id: int) -> list[dict]:
     """Get jobs for a specific run."""
-    result = _run_gh_cli(["run", "view", "-R", REPO, str(run_id), "--json", "jobs"])
-    if result.returncode != 0:
-        logger.error(f"Failed to get run jobs: {result.stderr}")
+    try:
+        response = _gh_api(f"actions/runs/{run_id}/jobs", {"per_page": 100})
+        jobs = response.json()["jobs"]
+        while "next" in response.links:
+            response = _gh_get(response.links["next"]["url"])
+            jobs.extend(response.json()["jobs"])
+    except requests.RequestException as e:
+        logger.error(f"Failed to get run jobs: {e}")
         return []
-    return json.loads(result.stdout).get("jobs", [])
+    return [
+        {"databaseId": j["id"], "name": j["name"], "conclusion": j["conclusion"]}
+        for j in jobs
+    ]
+
+
+def _match_keyword(name: str) -> str | None:
+    match = _JOB_RE.search(name)
+    return match.group(0) if match else None
 
 
-def find_target_jobs(run_id: int) -> list[dict]:
-    """Find all target jobs in a run."""
+def find_target_jobs(run_id: int) -> list[tuple[dict, str]]:
+    """Find all target jobs in a run, paired with the keyword they matched."""
     jobs = get_run_jobs(run_id)
-    return [j for j in jobs if any(k in j.get("name", "") for k in TARGET_JOBS)]
+    return [
+        (j, keyword)
+        for j in jobs
+        if (keyword := _match_keyword(j.get("name", ""))) is not None
+    ]
 
 
-def get_job_log(run_id: int, job_id: int) -> str:
-    """Get log content for a specific job, removing job/step prefix."""
-    result = _run_gh_cli(
-        ["run", "view", "-R", REPO, "--log", "--job", str(job_id), str(run_id)]
-    )
-    if result.returncode != 0:
-        logger.error(f"Failed to get job log: {result.stderr}")
-        return ""
-
-    lines = result.stdout.split("\n")
-    cleaned_lines = []
-    for line in lines:
-        first_tab = line.find("\t")
-        if first_tab == -1:
-            cleaned_lines.append(line)
-            continue
-        second_tab = line.find("\t", first_tab + 1)
-        if second_tab == -1:
-            cleaned_lines.append(line)
-        else:
-            cleaned_lines.append(line[second_tab + 1 :])
-    return "\n".join(cleaned_lines)
+def get_job_log(job_id: int, out: TextIO) -> float | None:
+    """Stream a job's log into out, returning the throughput seen on the way."""
+    throughput = None
+    # The API redirects to a signed blob URL; requests drops auth on the hop
+    with _gh_api(f"actions/jobs/{job_id}/logs", stream=True) as response:
+        # Split on line endings only, translating CRLF the way gh's text output did
+        response.raw.decode_content = True
+        # urllib3 otherwise reports closed at EOF and TextIOWrapper raises
+        response.raw.auto_close = False
+        reader = io.TextIOWrapper(
+            response.raw, encoding="utf-8-sig", errors="replace", newline=None
+        )
+        for line in reader:
+            out.write(line)
+            if throughput is None and "Output Token Throughput" in line:
+                throughput = _parse_throughput(line)
+    return throughput
 
 
-def extract_output_token_throughput(log_content: str) -> float | None:
-    """Extract output token throughput from log content."""
-    match = re.search(
-        r"Output Token Throughput │ total\s+│ (\d+\.\d+) token/s", log_content
-    )
+def _parse_throughput(text: str) -> float | None:
+    match = _THROUGHPUT_RE.search(text)
     if match:
         try:
             return float(match.group(1))
@@ -130,35 +192,69 @@ def extract_output_token_throughput(log_content: str) -> float | None:
     return None
 
 
+def extract_output_token_throughput(log_content: str) -> float | None:
+    """Extract output token throughput from log content."""
+    # A plain substring scan rules out most logs before the regex engine runs
+    if "Output Token Throughput" not in log_content:
+        return None
+    return _parse_throughput(log_content)
+
+
+def _log_path_for(
+    logs_dir: Path,
+    run_date: str,
+    run_id: int,
+    commit_sha: str,
+    keyword: str,
+    job_id: int,
+) -> Path:
+    """Deterministic log file location for a (run, job) pair."""
+    short_sha = commit_sha[:7] if commit_sha else str(run_id)
+    return logs_dir / run_date / f"{run_date}_{short_sha}_{keyword}_{job_id}.log"
+
+
 def save_log(
     LOGS_DIR: Path,
     run_date: str,
     run_id: int,
     job: dict,
-    log_content: str,
     keyword: str,
     commit_sha: str = "",
-) -> Path | None:
-    """Save log content to file."""
-    log_dir = LOGS_DIR / run_date
-    log_dir.mkdir(parents=True, exist_ok=True)
-
-    short_sha = commit_sha[:7] if commit_sha else str(run_id)
-    filename = f"{run_date}_{short_sha}_{keyword}_{job['databaseId']}.log"
-    log_path = log_dir / filename
+) -> tuple[Path | None, float | None]:
+    """Download a job's log straight to file; returns (path, throughput)."""
+    log_path = _log_path_for(
+        LOGS_DIR, run_date, run_id, commit_sha, keyword, job["databaseId"]
+    )
+    if log_path.parent not in _MADE_DIRS:
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        _MADE_DIRS.add(log_path.parent)
 
     if log_path.exists():
-        return None
-
-    with open(log_path, "w", encoding="utf-8") as f:
-        f.write(f"# Run ID: {run_id}\n")
-        f.write(f"# Commit: {commit_sha}\n")
-        f.write(f"# Job: {job['name']}\n")
-        f.write(f"# Date: {run_date}\n")
-        f.write("=" * 60 + "\n\n")
-        f.write(log_content)
+        return None, None
+
+    # Stream into a sibling file so a failed download never looks already saved
+    part_path = log_path.with_name(log_path.name + ".part")
+    try:
+        with open(part_path, "w", encoding="utf-8", buffering=1 << 20) as f:
+            f.write(
+                f"# Run ID: {run_id}\n"
+                f"# Commit: {commit_sha}\n"
+                f"# Job: {job['name']}\n"
+                f"# Date: {run_date}\n"
+                f"{_LOG_SEP}"
+            )
+            throughput = get_job_log(job["databaseId"], f)
+        os.replace(part_path, log_path)
+    # The body is read from the raw urllib3 stream, so a mid-stream failure
+    # raises urllib3's errors rather than requests'; RequestException is an
+    # OSError and is covered too
+    except (urllib3.exceptions.HTTPError, OSError) as e:
+        logger.error(f"Failed to get job log for run {run_id}: {e}")
+        return None, None
+    finally:
+        part_path.unlink(missing_ok=True)
 
-    return log_path
+    return log_path, throughput
 
 
 def init_db(logs_dir: Path) -> None:
@@ -226,7 +322,7 @@ def export_csv(logs_dir: Path, conn: sqlite3.Connection):
             (keyword,),
         ).fetchall()
         csv_path = logs_dir / f"{keyword}_results.csv"
-        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        with open(csv_path, "w", newline="", encoding="utf-8", buffering=1 << 16) as f:
             writer = csv.writer(f)
             writer.writerow(
                 [
@@ -239,31 +335,28 @@ def export_csv(logs_dir: Path, conn: sqlite3.Connection):
                     "错误类型",
                 ]
             )
-            for (
-                run_time,
-                success,
-                commit_sha,
-                job_id,
-                throughput,
-                run_id,
-                error_type,
-            ) in rows:
-                job_link = (
+            writer.writerows(
+                (
+                    run_time,
+                    success,
+                    commit_sha,
+                    job_id,
+                    throughput if throughput is not None else "",
                     f"https://github.com/{REPO}/actions/runs/{run_id}/job/{job_id}"
                     if run_id
-                    else ""
-                )
-                writer.writerow(
-                    [
-                        run_time,
-                        success,
-                        commit_sha,
-                        job_id,
-                        throughput if throughput is not None else "",
-                        job_link,
-                        error_type or "",
-                    ]
+                    else "",
+                    error_type or "",
                 )
+                for (
+                    run_time,
+                    success,
+                    commit_sha,
+                    job_id,
+                    throughput,
+                    run_id,
+                    error_type,
+                ) in rows
+            )
         logger.info(f"Exported {len(rows)} rows → {csv_path.name}")
 
 
@@ -300,7 +393,7 @@ def fetch(runs: int, workers: int):
         logger.error("No runs found")
 
     # Phase 1: fetch jobs for all runs concurrently
-    run_jobs: list[tuple[dict, list[dict]]] = []
+    run_jobs: list[tuple[dict, list[tuple[dict, str]]]] = []
     with ThreadPoolExecutor(max_workers=workers) as pool:
         futures = {pool.submit(find_target_jobs, r["databaseId"]): r for r in runs_data}
         for fut in as_completed(futures):
@@ -314,37 +407,36 @@ def fetch(runs: int, workers: int):
                 run_jobs.append((run, jobs))
 
     # Phase 2: fetch logs for all (run, job) pairs concurrently
-    def _process_job(run: dict, job: dict, _db_path: Path = db_path):
+    def _process_job(
+        run: dict, job: dict, matched_keyword: str, _db_path: Path = db_path
+    ):
         commit_sha = run.get("headSha", "")
         run_date = run["createdAt"][:10]
-        matched_keyword = next((k for k in TARGET_JOBS if k in job.get("name", "")), "")
-        short_sha = commit_sha[:7] if commit_sha else str(run["databaseId"])
-        expected_log = (
-            LOGS_DIR
-            / run_date
-            / f"{run_date}_{short_sha}_{matched_keyword}_{job['databaseId']}.log"
+        expected_log = _log_path_for(
+            LOGS_DIR,
+            run_date,
+            run["databaseId"],
+            commit_sha,
+            matched_keyword,
+            job["databaseId"],
         )
 
         if expected_log.exists():
             logger.info(f"  {job['name']} log skipped (already exists)")
             log_content = expected_log.read_text(encoding="utf-8", errors="replace")
+            output_token_throughput = extract_output_token_throughput(log_content)
         else:
-            log_content = get_job_log(run["databaseId"], job["databaseId"])
-            if log_content:
-                log_path = save_log(
-                    LOGS_DIR,
-                    run_date,
-                    run["databaseId"],
-                    job,
-                    log_content,
-                    matched_keyword,
-                    commit_sha,
-                )
+            log_path, output_token_throughput = save_log(
+                LOGS_DIR,
+                run_date,
+                run["databaseId"],
+                job,
+                matched_keyword,
+                commit_sha,
+            )
+            if log_path:
                 logger.success(f"  Log saved: {log_path}")
 
-        output_token_throughput = (
-            extract_output_token_throughput(log_content) if log_content else None
-        )
         thread_conn = sqlite3.connect(_db_path)
         upsert_result(
             thread_conn,
@@ -358,10 +450,11 @@ def fetch(runs: int, workers: int):
         )
         thread_conn.close()
 
-    tasks = [(run, job) for run, jobs in run_jobs for job in jobs]
+    tasks = [(run, job, keyword) for run, jobs in run_jobs for job, keyword in jobs]
     with ThreadPoolExecutor(max_workers=workers) as pool:
         futures = {
-            pool.submit(_process_job, run, job): (run, job) for run, job in tasks
+            pool.submit(_process_job, run, job, keyword): (run, job)
+            for run, job, keyword in tasks
         }
         for fut in as_completed(futures):
             fut.result()
@@ -506,8 +599,6 @@ def analyze(date: str | None, keyword: str | None, tail: int, workers: int):
     env_path = script_dir.parent / ".env"
     load_dotenv(env_path)
 
-    import os
-
     api_key = os.environ.get("OPENAI_API_KEY")
     base_url = os.environ.get("OPENAI_BASE_URL")
     model = os.environ.get("OPENAI_MODEL", "gpt-4o")